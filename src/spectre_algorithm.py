@@ -22,10 +22,24 @@
 # It attaches the following functions to the global `spectre` object:
 # `newUserKey`, `newSiteKey`, `newSiteResult` & `newIdenticon`: 
 # They are used to perform stateless Spectre algorithm operations.
+#
+# The constants come from the generated spectre_tables module so that importing
+# this file does not build SpectreTypes. `spectreTypes` is still available from
+# this module; spectre_types is only imported when it is first accessed.
 
 import hmac
 import hashlib
-from spectre_types import spectreTypes
+from spectre_tables import (ALGORITHM_CURRENT, ALGORITHM_FIRST, ALGORITHM_LAST, PURPOSE,
+                            RESULT_TYPE_PASSWORD, RESULT_TYPE_LOGIN, RESULT_TYPE_ANSWER,
+                            COUNTER_DEFAULT, TEMPLATES, CHARACTERS, IDENTICONS)
+
+
+def __getattr__(name):
+    if name == "spectreTypes":
+        from spectre_types import spectreTypes
+        return spectreTypes
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+# __getattr__
 
 
 class SpectreError(Exception):
@@ -36,6 +50,11 @@ class SpectreError(Exception):
         super().__init__(self.message)
     # __init__
 
+    def __reduce__(self):
+        # pickle with both arguments, e.g. when raised in a worker process
+        return (type(self), (self.cause, self.message))
+    # __reduce__
+
 
 # SpectreError
 
@@ -49,10 +68,10 @@ def uint32_to_bytes(x: int) -> bytes:
 
 class Spectre:
 
-    def newUserKey(self, userName, userSecret, algorithmVersion=spectreTypes.algorithm["current"]):
+    def newUserKey(self, userName, userSecret, algorithmVersion=ALGORITHM_CURRENT):
         print(f"[spectre]: userKey: {userName} (algorithmVersion={algorithmVersion})\n")
 
-        if algorithmVersion < spectreTypes.algorithm["first"] or algorithmVersion > spectreTypes.algorithm["last"]:
+        if algorithmVersion < ALGORITHM_FIRST or algorithmVersion > ALGORITHM_LAST:
             raise SpectreError("algorithmVersion", f"Unsupported algorithm version: {algorithmVersion}.")
         elif userName is None or len(userName) == 0:
             raise SpectreError("userName", "Missing user name.")
@@ -62,7 +81,7 @@ class Spectre:
         try:
             userSecretBytes = bytes(userSecret, "utf-8")
             userNameBytes = bytes(userName, "utf-8")
-            keyPurpose = bytes(spectreTypes.purpose["authentication"], "utf-8")
+            keyPurpose = bytes(PURPOSE["authentication"], "utf-8")
 
             # 1. Populate user salt: scope | #userName | userName
             userSalt = keyPurpose
@@ -82,8 +101,8 @@ class Spectre:
             raise ex
     # newUserKey
     
-    def newSiteKey(self, userKey, siteName, keyCounter=spectreTypes.counter["default"], 
-        keyPurpose=spectreTypes.purpose["authentication"], keyContext=None):
+    def newSiteKey(self, userKey, siteName, keyCounter=COUNTER_DEFAULT, 
+        keyPurpose=PURPOSE["authentication"], keyContext=None):
         print(f"[spectre]: siteKey: {siteName} (keyCounter={keyCounter}, keyPurpose={keyPurpose}, keyContext={keyContext})\n")
     
         if userKey is None:
@@ -125,14 +144,19 @@ class Spectre:
     # newSiteKey
 
     def newSiteResult(self, userKey, siteName,
-        resultType=spectreTypes.resultType["defaultPassword"], 
-        keyCounter=spectreTypes.counter["default"],
-        keyPurpose=spectreTypes.purpose["authentication"], keyContext=None):
+        resultType=RESULT_TYPE_PASSWORD, 
+        keyCounter=COUNTER_DEFAULT,
+        keyPurpose=PURPOSE["authentication"], keyContext=None):
         print(f"[spectre]: result: {siteName} (resultType={resultType}, keyCounter={keyCounter}, keyPurpose={keyPurpose}, keyContext={keyContext})\n")
 
-        if str(resultType) not in spectreTypes.templates:
+        # accept the string form ("17") as well, like the old str-keyed templates did
+        if isinstance(resultType, str) and resultType.isascii() and resultType.isdigit():
+            resultType = int(resultType)
+        resultTemplates = None
+        if isinstance(resultType, int) and not isinstance(resultType, bool):
+            resultTemplates = TEMPLATES.get(resultType)
+        if resultTemplates is None:
             raise SpectreError("resultType", f"Unsupported result template: {resultType}.")
-        resultTemplates = spectreTypes.templates[str(resultType)]
 
         siteKey = spectre.newSiteKey(userKey, siteName, keyCounter, keyPurpose, keyContext)
         siteKeyBytes = siteKey["keyData"]
@@ -152,7 +176,7 @@ class Spectre:
         result = ""
         for i in range(0, len(resultTemplate)):
             characterClass = resultTemplate[i]
-            characters = spectreTypes.characters[str(characterClass)]
+            characters = CHARACTERS[characterClass]
             result += str(characters[siteKeyBytes[i+1] % len(characters)])
 
         return result
@@ -167,11 +191,11 @@ class Spectre:
         seed = hmac.new(userSecretBytes, msg=userNameBytes, digestmod=hashlib.sha256).digest()
 
         return {
-            "leftArm": spectreTypes.identicons["leftArm"][seed[0] % len(spectreTypes.identicons["leftArm"])],
-            "body": spectreTypes.identicons["body"][seed[1] % len(spectreTypes.identicons["body"])],
-            "rightArm": spectreTypes.identicons["rightArm"][seed[2] % len(spectreTypes.identicons["rightArm"])],
-            "accessory": spectreTypes.identicons["accessory"][seed[3] % len(spectreTypes.identicons["accessory"])],
-            "color": spectreTypes.identicons["color"][seed[4] % len(spectreTypes.identicons["color"])]
+            "leftArm": IDENTICONS["leftArm"][seed[0] % len(IDENTICONS["leftArm"])],
+            "body": IDENTICONS["body"][seed[1] % len(IDENTICONS["body"])],
+            "rightArm": IDENTICONS["rightArm"][seed[2] % len(IDENTICONS["rightArm"])],
+            "accessory": IDENTICONS["accessory"][seed[3] % len(IDENTICONS["accessory"])],
+            "color": IDENTICONS["color"][seed[4] % len(IDENTICONS["color"])]
         }
     # newIdenticon
 
@@ -182,26 +206,26 @@ spectre = Spectre()
 
 class SpectreUser:
 
-    def __init__(self, userName, userSecret, algorithmVersion=spectreTypes.algorithm["current"]):
+    def __init__(self, userName, userSecret, algorithmVersion=ALGORITHM_CURRENT):
         self.userName = userName
         self.algorithmVersion = algorithmVersion
         self.identicon = spectre.newIdenticon(userName, userSecret)
         self.userKey = spectre.newUserKey(userName, userSecret, algorithmVersion)
     # __init__
 
-    def password(self, siteName, resultType=spectreTypes.resultType["defaultPassword"],
-                 keyCounter=spectreTypes.counter["default"], keyContext=None):
-        return self.result(siteName, resultType, keyCounter, spectreTypes.purpose["authentication"], keyContext)
+    def password(self, siteName, resultType=RESULT_TYPE_PASSWORD,
+                 keyCounter=COUNTER_DEFAULT, keyContext=None):
+        return self.result(siteName, resultType, keyCounter, PURPOSE["authentication"], keyContext)
     # password
 
-    def login(self, siteName, resultType=spectreTypes.resultType["defaultLogin"],
-              keyCounter=spectreTypes.counter["default"], keyContext=None):
-        return self.result(siteName, resultType, keyCounter, spectreTypes.purpose["identification"], keyContext)
+    def login(self, siteName, resultType=RESULT_TYPE_LOGIN,
+              keyCounter=COUNTER_DEFAULT, keyContext=None):
+        return self.result(siteName, resultType, keyCounter, PURPOSE["identification"], keyContext)
     # login
 
-    def answer(self, siteName, resultType=spectreTypes.resultType["defaultAnswer"],
-               keyCounter=spectreTypes.counter["default"], keyContext=None):
-        return self.result(siteName, resultType, keyCounter, spectreTypes.purpose["recovery"], keyContext)
+    def answer(self, siteName, resultType=RESULT_TYPE_ANSWER,
+               keyCounter=COUNTER_DEFAULT, keyContext=None):
+        return self.result(siteName, resultType, keyCounter, PURPOSE["recovery"], keyContext)
     # answer
 
     def result(self, siteName, resultType, keyCounter, keyPurpose, keyContext):
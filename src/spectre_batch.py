@@ -0,0 +1,454 @@
+# =============================================================================
+# Created by Tom Arn on 2023-02-12 ported from the Spectre code
+# of Maarten Billemont.
+# Copyright (c) 2023, Tom Arn, www.t-arn.com
+#
+# This file is part of pySpectre.
+# pySpectre is free software. You can modify it under the terms of
+# the GNU General Public License, either version 3 or any later version.
+# See the LICENSE file for details or consult <http://www.gnu.org/licenses/>.
+#
+# Note: this grant does not include any rights for use of Spectre's trademarks.
+# =============================================================================
+
+# spectre_batch
+# =============
+#
+# This file is responsible for regenerating the site results of many users in one job.
+#
+# It provides a SpectreBatch class which reads a JSON manifest:
+#
+#   {"users": [
+#       {"userName": "Robert Lee Mitchell", "algorithmVersion": 3,
+#        "sites": ["masterpasswordapp.com",
+#                  {"siteName": "example.com", "resultType": "templatePIN", "keyCounter": 2,
+#                   "keyPurpose": "authentication", "keyContext": null}]},
+#       {"userName": "Tom", "sitesFile": "tom_sites.txt"}
+#   ]}
+#
+# `sitesFile` (relative to the manifest) lists one site name per line.
+# User keys are derived in a bounded thread pool (scrypt releases the GIL) while the
+# results of the current user are rendered. The results are written in shards of
+# `chunkSize` sites, each shard is written to a temporary file and renamed into place.
+# Completed shards are recorded in the journal file of the output directory, so a
+# restarted job skips completed sites and, if all its shards are done, the user's scrypt.
+# The journal is only accepted for the same manifest, sites files, chunkSize and
+# resolveSites. The output directory and shards are only accessible by the owner.
+#
+# User secrets are only obtained through the `secretProvider(userName)` callback and are
+# never written anywhere. The output shards contain the generated results in clear text.
+#
+# With `renderProcesses` > 0 the results are rendered by spectre_parallel worker processes.
+#
+# Usage: python spectre_batch.py [-w keyWorkers] [-c chunkSize] [-p renderProcesses] [--resolve]
+#                                manifest.json outputDir
+
+import contextlib
+import getpass
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from spectre_tables import (ALGORITHM_CURRENT, ALGORITHM_FIRST, ALGORITHM_LAST, PURPOSE, RESULT_TYPE,
+                            RESULT_TYPE_PASSWORD, COUNTER_DEFAULT, COUNTER_LAST, TEMPLATES)
+from spectre_algorithm import SpectreError, spectre
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+def manifestInt(value, what):
+    # JSON numbers or strings of digits; no bools or fractions
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise SpectreError("manifest", f"The {what} is not an integer: {value!r}.")
+# manifestInt
+
+
+class SpectreBatchProgress:
+
+    def __init__(self, totalUsers, totalSites):
+        self.totalUsers = totalUsers
+        self.totalSites = totalSites
+        self.doneUsers = 0
+        self.doneSites = 0
+        # sites skipped because they were completed by an earlier run
+        self.skippedSites = 0
+        self.started = time.monotonic()
+    # __init__
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+    # elapsed
+
+    def throughput(self):
+        # sites per second rendered by this run
+        elapsed = self.elapsed()
+        if elapsed <= 0:
+            return 0.0
+        return self.doneSites / elapsed
+    # throughput
+
+    def eta(self):
+        # estimated seconds left, None while nothing was rendered yet
+        throughput = self.throughput()
+        if throughput <= 0:
+            return None
+        return (self.totalSites - self.skippedSites - self.doneSites) / throughput
+    # eta
+
+    def __str__(self):
+        eta = self.eta()
+        return "users {}/{}, sites {}/{}, {:.0f} sites/s, ETA {}".format(
+            self.doneUsers, self.totalUsers, self.skippedSites + self.doneSites, self.totalSites,
+            self.throughput(), "?" if eta is None else "{:.0f} s".format(eta))
+    # __str__
+# SpectreBatchProgress
+
+
+class SpectreBatch:
+
+    def __init__(self, manifestPath, outputDir, secretProvider, keyWorkers=2, chunkSize=1000,
+                 resolveSites=False, progress=None, renderProcesses=0):
+        self.manifestPath = manifestPath
+        self.outputDir = outputDir
+        self.secretProvider = secretProvider
+        self.keyWorkers = max(1, keyWorkers)
+        self.chunkSize = max(1, chunkSize)
+        self.resolveSites = resolveSites
+        self.progress = progress
+        # > 0 renders the results in that many processes (spectre_parallel)
+        self.renderProcesses = renderProcesses
+        self.journalPath = os.path.join(outputDir, JOURNAL_FILE)
+        self._resolveSiteName = None
+        self._journalTorn = False
+        self._journalHeader = False
+    # __init__
+
+    def loadManifest(self):
+        try:
+            with open(self.manifestPath, "rb") as f:
+                data = f.read()
+        except OSError as ex:
+            raise SpectreError("manifest", f"Cannot read manifest: {ex}.")
+        try:
+            manifest = json.loads(data)
+        except ValueError as ex:
+            raise SpectreError("manifest", f"Invalid manifest: {ex}.")
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("users"), list):
+            raise SpectreError("manifest", "The manifest has no users list.")
+        # everything is checked here, before any scrypt work starts
+        for user in manifest["users"]:
+            if not isinstance(user, dict) or not isinstance(user.get("userName"), str) or not user["userName"]:
+                raise SpectreError("manifest", "Missing user name in manifest.")
+            userName = user["userName"]
+            if ("sites" in user) == ("sitesFile" in user):
+                raise SpectreError("manifest", f"User {userName} needs either sites or sitesFile.")
+            algorithmVersion = manifestInt(user.get("algorithmVersion", ALGORITHM_CURRENT),
+                                           f"algorithmVersion of {userName}")
+            if algorithmVersion < ALGORITHM_FIRST or algorithmVersion > ALGORITHM_LAST:
+                raise SpectreError("manifest", f"Unsupported algorithm version of {userName}: {algorithmVersion}.")
+            user["algorithmVersion"] = algorithmVersion
+            if "sites" in user:
+                if not isinstance(user["sites"], list):
+                    raise SpectreError("manifest", f"The sites of {userName} are not a list.")
+                for site in user["sites"]:
+                    self.siteSpec(site)
+            elif not isinstance(user["sitesFile"], str) or not os.path.isfile(self.sitesFilePath(user)):
+                raise SpectreError("manifest", f"Sites file of {userName} not found: {user['sitesFile']}.")
+        return manifest, hashlib.sha256(data).hexdigest()
+    # loadManifest
+
+    def sitesFilePath(self, user):
+        return os.path.join(os.path.dirname(os.path.abspath(self.manifestPath)), user["sitesFile"])
+    # sitesFilePath
+
+    def iterSites(self, user):
+        if "sites" in user:
+            yield from user["sites"]
+            return
+        with open(self.sitesFilePath(user), "r", encoding="utf-8") as f:
+            for line in f:
+                site = line.strip()
+                if len(site) > 0:
+                    yield site
+    # iterSites
+
+    def countSites(self, user):
+        count = 0
+        for site in self.iterSites(user):
+            count += 1
+        return count
+    # countSites
+
+    def siteSpec(self, site):
+        if isinstance(site, str):
+            site = {"siteName": site}
+        if not isinstance(site, dict):
+            raise SpectreError("manifest", f"Invalid site entry: {site!r}.")
+        siteName = site.get("siteName")
+        if not isinstance(siteName, str) or len(siteName) == 0:
+            raise SpectreError("manifest", f"Missing site name in site entry: {site!r}.")
+        if self._resolveSiteName is not None:
+            siteName = self._resolveSiteName(siteName)
+        resultType = site.get("resultType", RESULT_TYPE_PASSWORD)
+        if isinstance(resultType, str) and resultType in RESULT_TYPE:
+            resultType = RESULT_TYPE[resultType]
+        else:
+            resultType = manifestInt(resultType, f"resultType of {siteName}")
+        if resultType not in TEMPLATES:
+            raise SpectreError("manifest", f"Unsupported result type of {siteName}: {resultType}.")
+        keyCounter = manifestInt(site.get("keyCounter", COUNTER_DEFAULT), f"keyCounter of {siteName}")
+        if keyCounter < 1 or keyCounter > COUNTER_LAST:
+            raise SpectreError("manifest", f"Invalid counter value of {siteName}: {keyCounter}.")
+        keyPurpose = site.get("keyPurpose", "authentication")
+        if not isinstance(keyPurpose, str) or keyPurpose not in PURPOSE:
+            raise SpectreError("manifest", f"Unknown key purpose of {siteName}: {keyPurpose}.")
+        keyContext = site.get("keyContext")
+        if keyContext is not None and not isinstance(keyContext, str):
+            raise SpectreError("manifest", f"The keyContext of {siteName} is not a string.")
+        return (siteName, resultType, keyCounter, PURPOSE[keyPurpose], keyContext)
+    # siteSpec
+
+    def jobHeader(self, manifest, manifestDigest):
+        # the journal's (user, shard) entries are only valid for the same sites and shard layout
+        sitesFiles = {}
+        for user in manifest["users"]:
+            if "sitesFile" in user:
+                with open(self.sitesFilePath(user), "rb") as f:
+                    sitesFiles[user["sitesFile"]] = hashlib.sha256(f.read()).hexdigest()
+        return {"manifest": manifestDigest, "chunkSize": self.chunkSize,
+                "resolveSites": self.resolveSites, "sitesFiles": sitesFiles}
+    # jobHeader
+
+    def readJournal(self, header):
+        done = set()
+        self._journalHeader = False
+        if not os.path.exists(self.journalPath):
+            return done
+        with open(self.journalPath, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+            if len(lines[-1]) > 0:
+                # a torn last line from a crash, later entries must start on a new line
+                self._journalTorn = True
+            for line in lines:
+                if len(line) == 0:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if "manifest" in entry:
+                    if entry["manifest"] != header["manifest"]:
+                        raise SpectreError("journal",
+                                           f"{self.journalPath} belongs to a different manifest.")
+                    for key in ("chunkSize", "resolveSites", "sitesFiles"):
+                        if entry.get(key) != header[key]:
+                            raise SpectreError("journal",
+                                               f"{self.journalPath} was written with a different {key}.")
+                    self._journalHeader = True
+                else:
+                    done.add((entry["user"], entry["shard"]))
+        return done
+    # readJournal
+
+    def appendJournal(self, journal, entry):
+        journal.write(json.dumps(entry) + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+    # appendJournal
+
+    def shardPath(self, userIndex, shardIndex):
+        return os.path.join(self.outputDir, "{:05d}-{:05d}.tsv".format(userIndex, shardIndex))
+    # shardPath
+
+    def syncOutputDir(self):
+        # makes renames and new files durable; directories can't be fsynced on Windows
+        if os.name == "nt":
+            return
+        fd = os.open(self.outputDir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    # syncOutputDir
+
+    def writeShard(self, path, lines):
+        tmpPath = path + ".tmp"
+        if os.path.exists(tmpPath):
+            # left over from a crash
+            os.remove(tmpPath)
+        # the shards hold the results in clear text, only the owner may read them
+        fd = os.open(tmpPath, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpPath, path)
+        self.syncOutputDir()
+    # writeShard
+
+    def submitUserKey(self, pool, user):
+        # the secret is requested on the calling thread (one prompt at a time)
+        # and only passed on to the scrypt task
+        userName = user["userName"]
+        return pool.submit(spectre.newUserKey, userName, self.secretProvider(userName),
+                           user.get("algorithmVersion", ALGORITHM_CURRENT))
+    # submitUserKey
+
+    def renderUser(self, userIndex, user, userKey, renderer, done, journal, progress):
+        if renderer is not None:
+            renderer.setUserKey(userKey)
+        try:
+            shardIndex = 0
+            specs = []
+            for site in self.iterSites(user):
+                # None marks the sites of shards completed by an earlier run
+                specs.append(None if (userIndex, shardIndex) in done else self.siteSpec(site))
+                if len(specs) == self.chunkSize:
+                    self.finishShard(userIndex, shardIndex, user, userKey, renderer, specs, journal, progress)
+                    shardIndex += 1
+                    specs = []
+            if len(specs) > 0:
+                self.finishShard(userIndex, shardIndex, user, userKey, renderer, specs, journal, progress)
+        finally:
+            if renderer is not None:
+                renderer.clearUserKey()
+    # renderUser
+
+    def finishShard(self, userIndex, shardIndex, user, userKey, renderer, specs, journal, progress):
+        if specs[0] is None:
+            progress.skippedSites += len(specs)
+            return
+        if renderer is not None:
+            # the renderer has no key contexts, those sites are rendered here
+            parallel = [index for index, spec in enumerate(specs) if spec[4] is None]
+            results = [None] * len(specs)
+            for index, result in zip(parallel, renderer.render([specs[index] for index in parallel])):
+                results[index] = result
+            for index, spec in enumerate(specs):
+                if results[index] is None:
+                    results[index] = spectre.newSiteResult(userKey, *spec)
+        else:
+            results = [spectre.newSiteResult(userKey, *spec) for spec in specs]
+        lines = []
+        for (siteName, resultType, keyCounter, keyPurpose, keyContext), result in zip(specs, results):
+            lines.append("\t".join((user["userName"], siteName, str(resultType), str(keyCounter), result)) + "\n")
+        self.writeShard(self.shardPath(userIndex, shardIndex), lines)
+        self.appendJournal(journal, {"user": userIndex, "shard": shardIndex})
+        progress.doneSites += len(specs)
+        if self.progress is not None:
+            self.progress(progress)
+    # finishShard
+
+    def run(self):
+        manifest, manifestDigest = self.loadManifest()
+        users = manifest["users"]
+        if self.resolveSites:
+            from spectre_sites import resolveSiteName, siteResolver
+            # fail before any work when the public suffix list is missing
+            siteResolver.load()
+            self._resolveSiteName = resolveSiteName
+        os.makedirs(self.outputDir, mode=0o700, exist_ok=True)
+        header = self.jobHeader(manifest, manifestDigest)
+        done = self.readJournal(header)
+        siteCounts = [self.countSites(user) for user in users]
+        progress = SpectreBatchProgress(len(users), sum(siteCounts))
+
+        # users with pending shards need a user key, the others are skipped entirely
+        pending = []
+        for userIndex, user in enumerate(users):
+            shards = (siteCounts[userIndex] + self.chunkSize - 1) // self.chunkSize
+            if all((userIndex, shardIndex) in done for shardIndex in range(shards)):
+                progress.doneUsers += 1
+                progress.skippedSites += siteCounts[userIndex]
+            else:
+                pending.append(userIndex)
+
+        # one process pool for the whole job, only the key changes per user
+        renderer = None
+        if self.renderProcesses > 0 and len(pending) > 0:
+            from spectre_parallel import SpectreParallelRenderer
+            renderer = SpectreParallelRenderer(processes=self.renderProcesses)
+        try:
+            with open(self.journalPath, "a", encoding="utf-8") as journal, \
+                    ThreadPoolExecutor(max_workers=self.keyWorkers) as pool:
+                if self._journalTorn:
+                    journal.write("\n")
+                if not self._journalHeader:
+                    # a new journal, or one whose header line was torn before any shard was recorded
+                    self.appendJournal(journal, header)
+                    self.syncOutputDir()
+                # keep at most keyWorkers user keys ahead of the renderer
+                futures = {}
+                nextSubmit = 0
+                for position, userIndex in enumerate(pending):
+                    while nextSubmit < len(pending) and nextSubmit <= position + self.keyWorkers:
+                        futures[pending[nextSubmit]] = self.submitUserKey(pool, users[pending[nextSubmit]])
+                        nextSubmit += 1
+                    userKey = futures.pop(userIndex).result()
+                    self.renderUser(userIndex, users[userIndex], userKey, renderer, done, journal, progress)
+                    progress.doneUsers += 1
+                    if self.progress is not None:
+                        self.progress(progress)
+        finally:
+            if renderer is not None:
+                renderer.close()
+        return progress
+    # run
+# SpectreBatch
+
+
+def main(argv):
+    keyWorkers = 2
+    chunkSize = 1000
+    resolveSites = False
+    renderProcesses = 0
+    args = []
+    i = 0
+    while i < len(argv):
+        if argv[i] == "-w" and i + 1 < len(argv):
+            keyWorkers = int(argv[i + 1])
+            i += 1
+        elif argv[i] == "-c" and i + 1 < len(argv):
+            chunkSize = int(argv[i + 1])
+            i += 1
+        elif argv[i] == "-p" and i + 1 < len(argv):
+            renderProcesses = int(argv[i + 1])
+            i += 1
+        elif argv[i] == "--resolve":
+            resolveSites = True
+        else:
+            args.append(argv[i])
+        i += 1
+    if len(args) != 2:
+        print("Usage: python spectre_batch.py [-w keyWorkers] [-c chunkSize] [-p renderProcesses] [--resolve] "
+              "manifest.json outputDir", file=sys.stderr)
+        return 2
+
+    def secretProvider(userName):
+        return getpass.getpass(f"Secret of {userName}: ")
+    # secretProvider
+
+    def showProgress(progress):
+        print(progress, file=sys.stderr)
+    # showProgress
+
+    batch = SpectreBatch(args[0], args[1], secretProvider, keyWorkers, chunkSize, resolveSites, showProgress,
+                         renderProcesses)
+    try:
+        # Spectre traces every call on stdout, millions of lines for a large job
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            batch.run()
+    except SpectreError as ex:
+        print(ex.message, file=sys.stderr)
+        return 1
+    return 0
+# main
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,236 @@
+# =============================================================================
+# Created by Tom Arn on 2023-02-12 ported from the Spectre code
+# of Maarten Billemont.
+# Copyright (c) 2023, Tom Arn, www.t-arn.com
+#
+# This file is part of pySpectre.
+# pySpectre is free software. You can modify it under the terms of
+# the GNU General Public License, either version 3 or any later version.
+# See the LICENSE file for details or consult <http://www.gnu.org/licenses/>.
+#
+# Note: this grant does not include any rights for use of Spectre's trademarks.
+# =============================================================================
+
+# spectre_parallel
+# ================
+#
+# This file is responsible for rendering many site results of one user in several processes.
+#
+# It provides a SpectreParallelRenderer class. The user key and a table of fixed-width
+# site records live in `multiprocessing.shared_memory`, so a task is only a record range.
+# The workers run `spectre.newSiteResult` and write fixed-width results into a shared
+# output buffer, which the parent decodes straight from the shared memory.
+# The process pool lives as long as the renderer; `setUserKey` only swaps the key segment,
+# so one renderer can serve all users of a batch job.
+#
+# Site record: name length (uint8) | site name (utf-8, SITE_NAME_WIDTH bytes) |
+#              resultType (uint32) | keyCounter (uint32) | keyPurpose index (uint8)
+# Result record: length (uint8) | result (ascii, RESULT_WIDTH bytes)
+#
+# Key contexts are not supported (spectre_batch renders those sites serially).
+# The key, site and result memory is zeroed before it is released. The workers zero
+# their copy of a key when the next key arrives and when they exit.
+
+import math
+import os
+import struct
+import sys
+from multiprocessing import Pool, resource_tracker, shared_memory, util
+from spectre_tables import PURPOSE, TEMPLATES, COUNTER_LAST
+from spectre_algorithm import SpectreError, spectre
+
+SITE_NAME_WIDTH = 255
+SITE_RECORD = struct.Struct(f"<B{SITE_NAME_WIDTH}sIIB")
+RESULT_WIDTH = max(len(template) for templates in TEMPLATES.values() for template in templates)
+RESULT_RECORD_SIZE = 1 + RESULT_WIDTH
+KEY_SIZE = 64
+PURPOSES = tuple(PURPOSE.values())
+
+# worker process state
+_keyName = None
+_userKey = None
+_buffers = {}
+
+
+def _wipeKey():
+    global _keyName, _userKey
+    if _userKey is not None:
+        keyCrypto = _userKey["keyCrypto"]
+        for i in range(len(keyCrypto)):
+            keyCrypto[i] = 0
+    _keyName = None
+    _userKey = None
+# _wipeKey
+
+
+def _wipeWorker():
+    _wipeKey()
+    _closeBuffers()
+# _wipeWorker
+
+
+def _initWorker():
+    # the per-call trace of Spectre would only interleave across the workers
+    sys.stdout = open(os.devnull, "w")
+    util.Finalize(None, _wipeWorker, exitpriority=10)
+# _initWorker
+
+
+def _attachKey(keyName):
+    global _keyName, _userKey
+    if keyName != _keyName:
+        # the next user, drop the key of the previous one
+        _wipeKey()
+        # the parent owns and unlinks the segments
+        keyShm = shared_memory.SharedMemory(name=keyName)
+        try:
+            # hmac accepts a bytearray key, which can be zeroed
+            _userKey = {"keyCrypto": bytearray(keyShm.buf[:KEY_SIZE]), "keyAlgorithm": keyShm.buf[KEY_SIZE]}
+            _keyName = keyName
+        finally:
+            keyShm.close()
+    return _userKey
+# _attachKey
+
+
+def _closeBuffers():
+    for shm in _buffers.values():
+        shm.close()
+    _buffers.clear()
+# _closeBuffers
+
+
+def _attachBuffers(sitesName, resultsName):
+    if sitesName not in _buffers:
+        # a new render call, drop the buffers of the previous one
+        _closeBuffers()
+        _buffers[sitesName] = shared_memory.SharedMemory(name=sitesName)
+        _buffers[resultsName] = shared_memory.SharedMemory(name=resultsName)
+    return _buffers[sitesName].buf, _buffers[resultsName].buf
+# _attachBuffers
+
+
+def _renderRange(keyName, sitesName, resultsName, start, end):
+    userKey = _attachKey(keyName)
+    sites, results = _attachBuffers(sitesName, resultsName)
+    for index in range(start, end):
+        nameLength, name, resultType, keyCounter, purpose = SITE_RECORD.unpack_from(sites, index * SITE_RECORD.size)
+        result = spectre.newSiteResult(userKey, name[:nameLength].decode("utf-8"), resultType, keyCounter,
+                                       PURPOSES[purpose])
+        offset = index * RESULT_RECORD_SIZE
+        resultBytes = result.encode("ascii")
+        results[offset] = len(resultBytes)
+        results[offset + 1:offset + 1 + len(resultBytes)] = resultBytes
+    return end - start
+# _renderRange
+
+
+def _wipe(shm):
+    shm.buf[:] = bytes(shm.size)
+    shm.close()
+    shm.unlink()
+# _wipe
+
+
+class SpectreParallelRenderer:
+
+    def __init__(self, userKey=None, processes=None, tasksPerProcess=4):
+        self.processes = processes or os.cpu_count() or 1
+        self.tasksPerProcess = tasksPerProcess
+        self._keyShm = None
+        # start the tracker before the workers so they share it instead of starting
+        # their own, which would unlink the parent's segments when a worker exits
+        resource_tracker.ensure_running()
+        self._pool = Pool(self.processes, initializer=_initWorker)
+        if userKey is not None:
+            self.setUserKey(userKey)
+    # __init__
+
+    def setUserKey(self, userKey):
+        if userKey is None:
+            raise SpectreError("userKey", "Missing user secret.")
+        self.clearUserKey()
+        # a new segment (and name) per key tells the workers to reload it
+        self._keyShm = shared_memory.SharedMemory(create=True, size=KEY_SIZE + 1)
+        self._keyShm.buf[:KEY_SIZE] = userKey["keyCrypto"]
+        self._keyShm.buf[KEY_SIZE] = userKey["keyAlgorithm"]
+    # setUserKey
+
+    def clearUserKey(self):
+        if self._keyShm is not None:
+            _wipe(self._keyShm)
+            self._keyShm = None
+    # clearUserKey
+
+    def packSites(self, sites):
+        # sites: sequence of (siteName, resultType, keyCounter, keyPurpose, keyContext)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(sites) * SITE_RECORD.size))
+        try:
+            for index, (siteName, resultType, keyCounter, keyPurpose, keyContext) in enumerate(sites):
+                # the record has to hold these values
+                if siteName is None or len(siteName) == 0:
+                    raise SpectreError("siteName", "Missing site name.")
+                siteNameBytes = bytes(siteName, "utf-8")
+                if len(siteNameBytes) > SITE_NAME_WIDTH:
+                    raise SpectreError("siteName", f"Site name longer than {SITE_NAME_WIDTH} bytes: {siteName}.")
+                if isinstance(resultType, str) and resultType.isascii() and resultType.isdigit():
+                    resultType = int(resultType)
+                if not isinstance(resultType, int) or isinstance(resultType, bool) or resultType not in TEMPLATES:
+                    raise SpectreError("resultType", f"Unsupported result template: {resultType}.")
+                if keyCounter < 1 or keyCounter > COUNTER_LAST:
+                    raise SpectreError("keyCounter", f"Invalid counter value: {keyCounter}.")
+                if keyPurpose not in PURPOSES:
+                    raise SpectreError("keyPurpose", f"Unsupported key purpose: {keyPurpose}.")
+                if keyContext is not None:
+                    raise SpectreError("keyContext", "Key contexts are not supported in parallel rendering.")
+                SITE_RECORD.pack_into(shm.buf, index * SITE_RECORD.size, len(siteNameBytes), siteNameBytes,
+                                      resultType, keyCounter, PURPOSES.index(keyPurpose))
+        except BaseException:
+            _wipe(shm)
+            raise
+        return shm
+    # packSites
+
+    def render(self, sites):
+        if self._pool is None:
+            raise SpectreError("invalidate", "Renderer closed.")
+        if self._keyShm is None:
+            raise SpectreError("userKey", "Missing user secret.")
+        count = len(sites)
+        if count == 0:
+            return []
+        sitesShm = self.packSites(sites)
+        resultsShm = shared_memory.SharedMemory(create=True, size=count * RESULT_RECORD_SIZE)
+        try:
+            step = max(1, math.ceil(count / (self.processes * self.tasksPerProcess)))
+            tasks = [(self._keyShm.name, sitesShm.name, resultsShm.name, start, min(count, start + step))
+                     for start in range(0, count, step)]
+            self._pool.starmap(_renderRange, tasks)
+            buf = resultsShm.buf
+            results = []
+            for offset in range(0, count * RESULT_RECORD_SIZE, RESULT_RECORD_SIZE):
+                results.append(str(buf[offset + 1:offset + 1 + buf[offset]], "ascii"))
+            del buf
+            return results
+        finally:
+            _wipe(sitesShm)
+            _wipe(resultsShm)
+    # render
+
+    def close(self):
+        if self._pool is not None:
+            # close + join lets the workers run their exit finalizer (key wipe)
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self.clearUserKey()
+    # close
+
+    def __enter__(self):
+        return self
+    # __enter__
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+    # __exit__
+# SpectreParallelRenderer
@@ -0,0 +1,207 @@
+# =============================================================================
+# Created by Tom Arn on 2023-02-12 ported from the Spectre code
+# of Maarten Billemont.
+# Copyright (c) 2023, Tom Arn, www.t-arn.com
+#
+# This file is part of pySpectre.
+# pySpectre is free software. You can modify it under the terms of
+# the GNU General Public License, either version 3 or any later version.
+# See the LICENSE file for details or consult <http://www.gnu.org/licenses/>.
+#
+# Note: this grant does not include any rights for use of Spectre's trademarks.
+# =============================================================================
+
+# spectre_sites
+# =============
+#
+# This file is responsible for mapping URLs and host names to Spectre site names.
+#
+# Spectre names a site by its registrable domain, e.g. "https://www.example.co.uk/login"
+# is the site "example.co.uk". The registrable domain is found with the public suffix
+# list (https://publicsuffix.org/list/public_suffix_list.dat) read from a local file.
+# The rules are compiled into a trie of reversed labels when the first name is resolved.
+# The list file is required: without it "www.a.co.uk" and "www.b.co.uk" would both be
+# the site "co.uk". Only with `defaultRuleOnly` (CLI: -d) the missing list is accepted
+# and just the default rule "*" applies (the TLD is the public suffix).
+#
+# It creates the global `siteResolver` object and the `resolveSiteName` function.
+#
+# Usage: python spectre_sites.py [-l public_suffix_list.dat | -d] url ...
+
+import functools
+import ipaddress
+import os
+import re
+import sys
+import threading
+from urllib.parse import urlsplit
+from spectre_algorithm import SpectreError
+
+DEFAULT_SUFFIX_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix_list.dat")
+
+# trie node key holding the rule marker; labels are str, so an int key can't collide
+_RULE = 0
+_NORMAL = 1
+_EXCEPTION = 2
+
+# "scheme:" at the start of a URL
+_SCHEME = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+
+class SpectreSiteResolver:
+
+    def __init__(self, suffixListPath=None, cacheSize=4096, defaultRuleOnly=False):
+        self.suffixListPath = suffixListPath
+        # accept a missing list file and only apply the default rule "*"
+        self.defaultRuleOnly = defaultRuleOnly
+        self._trie = None
+        self._lock = threading.Lock()
+        self.siteName = functools.lru_cache(maxsize=cacheSize)(self._siteName)
+    # __init__
+
+    def load(self):
+        if self._trie is not None:
+            return self._trie
+        with self._lock:
+            if self._trie is None:
+                path = self.suffixListPath
+                if path is None:
+                    path = DEFAULT_SUFFIX_LIST
+                if not os.path.exists(path):
+                    if not self.defaultRuleOnly:
+                        raise SpectreError("suffixList", f"Public suffix list not found: {path}.")
+                    path = None
+                self._trie = self.compile(path)
+        return self._trie
+    # load
+
+    @staticmethod
+    def compile(path):
+        root = {}
+        if path is None:
+            return root
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                rule = line.strip()
+                if len(rule) == 0 or rule.startswith("//"):
+                    continue
+                # only the first word of a line is the rule
+                rule = rule.split()[0].lower()
+                marker = _NORMAL
+                if rule.startswith("!"):
+                    marker = _EXCEPTION
+                    rule = rule[1:]
+                node = root
+                for label in reversed(rule.split(".")):
+                    node = node.setdefault(label, {})
+                node[_RULE] = marker
+        return root
+    # compile
+
+    def hostName(self, url):
+        if url is None or len(url.strip()) == 0:
+            raise SpectreError("siteName", "Missing site name.")
+        url = site = url.strip()
+        scheme = _SCHEME.match(url)
+        if scheme is not None and not url[scheme.end():][:1].isdigit():
+            # a URL; "host:port" looks like a scheme too but is followed by digits
+            if not url[scheme.end():].startswith("//"):
+                raise SpectreError("siteName", f"Invalid site URL: {site}.")
+        else:
+            # a bare host name, possibly with a port, path or query
+            url = "//" + url
+        try:
+            host = urlsplit(url).hostname
+        except ValueError:
+            host = None
+        if host is None or len(host.strip(".")) == 0:
+            raise SpectreError("siteName", f"Invalid site URL: {site}.")
+        host = host.strip(".")
+        if "" in host.split("."):
+            raise SpectreError("siteName", f"Invalid site URL: {site}.")
+        if "xn--" in host:
+            try:
+                host = host.encode("ascii").decode("idna")
+            except UnicodeError:
+                pass
+        return host
+    # hostName
+
+    def publicSuffixLength(self, labels):
+        # labels are reversed: ["uk", "co", "example", "www"]
+        # the default rule "*" makes the last label a public suffix
+        suffixLength = 1
+        exceptionLength = 0
+        nodes = [self.load()]
+        for depth in range(len(labels)):
+            matched = []
+            for node in nodes:
+                for key in (labels[depth], "*"):
+                    child = node.get(key)
+                    if child is None:
+                        continue
+                    matched.append(child)
+                    marker = child.get(_RULE)
+                    if marker == _NORMAL:
+                        suffixLength = max(suffixLength, depth + 1)
+                    elif marker == _EXCEPTION:
+                        # an exception rule's suffix is the rule without its leftmost label
+                        exceptionLength = max(exceptionLength, depth)
+            if len(matched) == 0:
+                break
+            nodes = matched
+        if exceptionLength > 0:
+            return exceptionLength
+        return suffixLength
+    # publicSuffixLength
+
+    def _siteName(self, url):
+        host = self.hostName(url)
+        try:
+            ipaddress.ip_address(host)
+            return host
+        except ValueError:
+            pass
+        labels = host.split(".")
+        labels.reverse()
+        suffixLength = self.publicSuffixLength(labels)
+        if len(labels) <= suffixLength:
+            # the host is a public suffix itself
+            return host
+        return ".".join(reversed(labels[:suffixLength + 1]))
+    # _siteName
+# SpectreSiteResolver
+
+siteResolver = SpectreSiteResolver()
+
+
+def resolveSiteName(url):
+    return siteResolver.siteName(url)
+# resolveSiteName
+
+
+def main(argv):
+    resolver = siteResolver
+    if len(argv) >= 2 and argv[0] == "-l":
+        resolver = SpectreSiteResolver(argv[1])
+        argv = argv[2:]
+    elif len(argv) >= 1 and argv[0] == "-d":
+        resolver = SpectreSiteResolver(defaultRuleOnly=True)
+        argv = argv[1:]
+    if len(argv) == 0:
+        print("Usage: python spectre_sites.py [-l public_suffix_list.dat | -d] url ...", file=sys.stderr)
+        print("The public suffix list is required, -d only applies the default rule \"*\".", file=sys.stderr)
+        return 2
+    rc = 0
+    for url in argv:
+        try:
+            print(resolver.siteName(url))
+        except SpectreError as ex:
+            print(ex.message, file=sys.stderr)
+            rc = 1
+    return rc
+# main
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,102 @@
+# =============================================================================
+# Copyright (c) 2023, Tom Arn, www.t-arn.com
+#
+# This file is part of pySpectre.
+# pySpectre is free software. You can modify it under the terms of
+# the GNU General Public License, either version 3 or any later version.
+# See the LICENSE file for details or consult <http://www.gnu.org/licenses/>.
+#
+# Note: this grant does not include any rights for use of Spectre's trademarks.
+# =============================================================================
+
+# spectre_tables
+# ==============
+#
+# GENERATED by spectre_tables_gen.py from spectre_types.py - do not edit.
+#
+# Frozen copies of Spectre's constants used by spectre_algorithm.
+
+# same as types.MappingProxyType, without importing the types module
+MappingProxyType = type(type.__dict__)
+
+ALGORITHM_CURRENT = 3
+ALGORITHM_FIRST = 0
+ALGORITHM_LAST = 3
+
+PURPOSE = MappingProxyType({
+    'authentication': 'com.lyndir.masterpassword',
+    'identification': 'com.lyndir.masterpassword.login',
+    'recovery': 'com.lyndir.masterpassword.answer',
+})
+
+RESULT_TYPE = MappingProxyType({
+    'none': 0,
+    'templateMaximum': 16,
+    'templateLong': 17,
+    'templateMedium': 18,
+    'templateShort': 19,
+    'templateBasic': 20,
+    'templatePIN': 21,
+    'templateName': 30,
+    'templatePhrase': 31,
+    'statePersonal': 1056,
+    'stateDevice': 2081,
+    'deriveKey': 4160,
+    'defaultPassword': 17,
+    'defaultLogin': 30,
+    'defaultAnswer': 31,
+})
+
+RESULT_TYPE_PASSWORD = 17
+RESULT_TYPE_LOGIN = 30
+RESULT_TYPE_ANSWER = 31
+
+RESULT_NAME = MappingProxyType({
+    16: 'Maximum',
+    17: 'Long',
+    18: 'Medium',
+    19: 'Short',
+    20: 'Basic',
+    21: 'PIN',
+    30: 'Name',
+    31: 'Phrase',
+    1056: 'Own',
+    2081: 'Device',
+    4160: 'Key',
+})
+
+COUNTER_DEFAULT = 1
+COUNTER_FIRST = 0
+COUNTER_LAST = 4294967295
+
+TEMPLATES = MappingProxyType({
+    16: ('anoxxxxxxxxxxxxxxxxx', 'axxxxxxxxxxxxxxxxxno',),
+    17: ('CvcvnoCvcvCvcv', 'CvcvCvcvnoCvcv', 'CvcvCvcvCvcvno', 'CvccnoCvcvCvcv', 'CvccCvcvnoCvcv', 'CvccCvcvCvcvno', 'CvcvnoCvccCvcv', 'CvcvCvccnoCvcv', 'CvcvCvccCvcvno', 'CvcvnoCvcvCvcc', 'CvcvCvcvnoCvcc', 'CvcvCvcvCvccno', 'CvccnoCvccCvcv', 'CvccCvccnoCvcv', 'CvccCvccCvcvno', 'CvcvnoCvccCvcc', 'CvcvCvccnoCvcc', 'CvcvCvccCvccno', 'CvccnoCvcvCvcc', 'CvccCvcvnoCvcc', 'CvccCvcvCvccno',),
+    18: ('CvcnoCvc', 'CvcCvcno',),
+    19: ('Cvcn',),
+    20: ('aaanaaan', 'aannaaan', 'aaannaaa',),
+    21: ('nnnn',),
+    30: ('cvccvcvcv',),
+    31: ('cvcc cvc cvccvcv cvc', 'cvc cvccvcvcv cvcv', 'cv cvccv cvc cvcvccv',),
+})
+
+CHARACTERS = MappingProxyType({
+    'V': 'AEIOU',
+    'C': 'BCDFGHJKLMNPQRSTVWXYZ',
+    'v': 'aeiou',
+    'c': 'bcdfghjklmnpqrstvwxyz',
+    'A': 'AEIOUBCDFGHJKLMNPQRSTVWXYZ',
+    'a': 'AEIOUaeiouBCDFGHJKLMNPQRSTVWXYZbcdfghjklmnpqrstvwxyz',
+    'n': '0123456789',
+    'o': "@&%?,=[]_:-+*$#!'^~;()/.",
+    'x': 'AEIOUaeiouBCDFGHJKLMNPQRSTVWXYZbcdfghjklmnpqrstvwxyz0123456789!@#$%^&*()',
+    ' ': ' ',
+})
+
+IDENTICONS = MappingProxyType({
+    'leftArm': ('╔', '╚', '╰', '═',),
+    'body': ('█', '░', '▒', '▓', '☺', '☻',),
+    'rightArm': ('╗', '╝', '╯', '═',),
+    'accessory': ('◈', '◎', '◐', '◑', '◒', '◓', '☀', '☁', '☂', '☃', '☄', '★', '☆', '☎', '☏', '⎈', '⌂', '☘', '☢', '☣', '☕', '⌚', '⌛', '⏰', '⚡', '⛄', '⛅', '☔', '♔', '♕', '♖', '♗', '♘', '♙', '♚', '♛', '♜', '♝', '♞', '♟', '♨', '♩', '♪', '♫', '⚐', '⚑', '⚔', '⚖', '⚙', '⚠', '⌘', '⏎', '✄', '✆', '✈', '✉', '✌',),
+    'color': ('red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'currentcolor',),
+})
@@ -0,0 +1,112 @@
+# =============================================================================
+# Created by Tom Arn on 2023-02-12 ported from the Spectre code
+# of Maarten Billemont.
+# Copyright (c) 2023, Tom Arn, www.t-arn.com
+#
+# This file is part of pySpectre.
+# pySpectre is free software. You can modify it under the terms of
+# the GNU General Public License, either version 3 or any later version.
+# See the LICENSE file for details or consult <http://www.gnu.org/licenses/>.
+#
+# Note: this grant does not include any rights for use of Spectre's trademarks.
+# =============================================================================
+
+# spectre_tables_gen
+# ==================
+#
+# This file generates spectre_tables.py from the definitions in spectre_types.py.
+#
+# spectre_types.py stays the source of truth. spectre_tables.py holds the same data
+# as frozen literals (int-keyed, tuples, read-only mappings) so that importing
+# spectre_algorithm does not need to build SpectreTypes.
+#
+# Usage: python spectre_tables_gen.py          (re)write spectre_tables.py
+#        python spectre_tables_gen.py --check  exit 1 if spectre_tables.py is out of date
+
+import os
+import sys
+from spectre_types import spectreTypes
+
+TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spectre_tables.py")
+
+HEADER = """\
+# =============================================================================
+# Copyright (c) 2023, Tom Arn, www.t-arn.com
+#
+# This file is part of pySpectre.
+# pySpectre is free software. You can modify it under the terms of
+# the GNU General Public License, either version 3 or any later version.
+# See the LICENSE file for details or consult <http://www.gnu.org/licenses/>.
+#
+# Note: this grant does not include any rights for use of Spectre's trademarks.
+# =============================================================================
+
+# spectre_tables
+# ==============
+#
+# GENERATED by spectre_tables_gen.py from spectre_types.py - do not edit.
+#
+# Frozen copies of Spectre's constants used by spectre_algorithm.
+
+# same as types.MappingProxyType, without importing the types module
+MappingProxyType = type(type.__dict__)
+
+"""
+
+
+def _frozen_dict(values, key=lambda k: k, value=repr):
+    lines = ["MappingProxyType({"]
+    for k in values:
+        lines.append(f"    {key(k)!r}: {value(values[k])},")
+    lines.append("})")
+    return "\n".join(lines)
+# _frozen_dict
+
+
+def _tuple(values):
+    return "(" + ", ".join(repr(v) for v in values) + ",)"
+# _tuple
+
+
+def generate():
+    t = spectreTypes
+    out = [HEADER]
+    for name in ("current", "first", "last"):
+        out.append(f"ALGORITHM_{name.upper()} = {t.algorithm[name]!r}\n")
+    out.append("\n")
+    out.append(f"PURPOSE = {_frozen_dict(t.purpose)}\n\n")
+    out.append(f"RESULT_TYPE = {_frozen_dict(t.resultType)}\n\n")
+    for name in ("defaultPassword", "defaultLogin", "defaultAnswer"):
+        out.append(f"RESULT_TYPE_{name[len('default'):].upper()} = {t.resultType[name]!r}\n")
+    out.append("\n")
+    out.append(f"RESULT_NAME = {_frozen_dict(t.resultName, key=int)}\n\n")
+    for name in ("default", "first", "last"):
+        out.append(f"COUNTER_{name.upper()} = {t.counter[name]!r}\n")
+    out.append("\n")
+    out.append(f"TEMPLATES = {_frozen_dict(t.templates, key=int, value=_tuple)}\n\n")
+    out.append(f"CHARACTERS = {_frozen_dict(t.characters)}\n\n")
+    out.append(f"IDENTICONS = {_frozen_dict(t.identicons, value=_tuple)}\n")
+    return "".join(out)
+# generate
+
+
+def main(argv):
+    source = generate()
+    if "--check" in argv:
+        try:
+            with open(TABLES_FILE, "r", encoding="utf-8") as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current != source:
+            print("spectre_tables.py is out of date, run: python spectre_tables_gen.py", file=sys.stderr)
+            return 1
+        return 0
+    with open(TABLES_FILE, "w", encoding="utf-8") as f:
+        f.write(source)
+    return 0
+# main
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
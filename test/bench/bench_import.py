@@ -0,0 +1,49 @@
+# Import-time benchmark for spectre_algorithm.
+#
+# Usage: python bench_import.py [budget_ms] [runs]
+#
+# Checks that spectre_tables.py matches spectre_types.py, then imports
+# spectre_algorithm in fresh interpreters (python -X importtime) and
+# reports the best cumulative import time. Exits with 1 when the tables
+# are out of date or the import time is over the budget.
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src")
+DEFAULT_BUDGET_MS = 15.0
+
+
+def import_time_us(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=SRC_DIR, capture_output=True, text=True, check=True
+    )
+    # line format: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    raise RuntimeError("no import time reported for " + module)
+# import_time_us
+
+
+def main(argv):
+    budget = float(argv[0]) if len(argv) > 0 else DEFAULT_BUDGET_MS
+    runs = int(argv[1]) if len(argv) > 1 else 10
+    rc = subprocess.run([sys.executable, "spectre_tables_gen.py", "--check"], cwd=SRC_DIR).returncode
+    if rc != 0:
+        return 1
+    for module in ("spectre_types", "spectre_tables", "spectre_algorithm"):
+        best = min(import_time_us(module) for i in range(runs)) / 1000
+        print("{:20s} {:8.2f} ms".format(module, best))
+    if best > budget:
+        print("spectre_algorithm import time is over the budget of {} ms".format(budget), file=sys.stderr)
+        return 1
+    return 0
+# main
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,50 @@
+# Scaling benchmark for the multi-process site-result rendering.
+#
+# Usage: python bench_parallel.py [sites] [max_processes]
+#
+# Renders the same site list serially (spectre.newSiteResult) and with
+# SpectreParallelRenderer for 1 .. max_processes worker processes and
+# reports sites per second and the speedup against the serial run.
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+from spectre_algorithm import spectre
+from spectre_tables import PURPOSE, RESULT_TYPE_PASSWORD, COUNTER_DEFAULT
+from spectre_parallel import SpectreParallelRenderer
+
+
+def main(argv):
+    count = int(argv[0]) if len(argv) > 0 else 100000
+    maxProcesses = int(argv[1]) if len(argv) > 1 else (os.cpu_count() or 1)
+    sites = [("site{}.example.com".format(i), RESULT_TYPE_PASSWORD, COUNTER_DEFAULT, PURPOSE["authentication"], None)
+             for i in range(count)]
+    # keep Spectre's per-call trace out of the measurement
+    with contextlib.redirect_stdout(io.StringIO()):
+        userKey = spectre.newUserKey("Robert Lee Mitchell", "banana colored duckling")
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        started = time.perf_counter()
+        expected = [spectre.newSiteResult(userKey, *site) for site in sites]
+        serial = count / (time.perf_counter() - started)
+    print("serial:       {:10.0f} sites/s".format(serial))
+    for processes in range(1, maxProcesses + 1):
+        with SpectreParallelRenderer(userKey, processes) as renderer:
+            # the first call pays for the worker start-up
+            renderer.render(sites[:processes])
+            started = time.perf_counter()
+            results = renderer.render(sites)
+            rate = count / (time.perf_counter() - started)
+        if results != expected:
+            print("results differ from the serial run", file=sys.stderr)
+            return 1
+        print("processes {:2d}: {:10.0f} sites/s  x{:.2f}".format(processes, rate, rate / serial))
+    return 0
+# main
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,56 @@
+# Benchmark for the URL-to-site-name resolver.
+#
+# Usage: python bench_sites.py [public_suffix_list.dat] [lookups]
+#
+# Without a list file only the default rule "*" is used.
+#
+# Reports cold lookups (LRU cache disabled) and warm lookups
+# (repeated URLs served from the LRU cache) per second.
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src"))
+from spectre_sites import SpectreSiteResolver
+
+
+def make_urls(count):
+    tlds = ["com", "co.uk", "ch", "github.io", "de", "com.au"]
+    urls = []
+    for i in range(count):
+        urls.append("https://www{0}.site{0}.{1}/login?x={0}".format(i, tlds[i % len(tlds)]))
+    return urls
+# make_urls
+
+
+def bench(resolver, urls, lookups):
+    started = time.perf_counter()
+    done = 0
+    while done < lookups:
+        for url in urls:
+            resolver.siteName(url)
+        done += len(urls)
+    elapsed = time.perf_counter() - started
+    return done / elapsed
+# bench
+
+
+def main(argv):
+    path = argv[0] if len(argv) > 0 else None
+    defaultRuleOnly = path is None
+    lookups = int(argv[1]) if len(argv) > 1 else 1000000
+    started = time.perf_counter()
+    SpectreSiteResolver(path, defaultRuleOnly=defaultRuleOnly).load()
+    print("load:  {:10.1f} ms".format((time.perf_counter() - started) * 1000))
+    cold = SpectreSiteResolver(path, cacheSize=0, defaultRuleOnly=defaultRuleOnly)
+    cold.load()
+    print("cold:  {:10.0f} lookups/s".format(bench(cold, make_urls(10000), lookups // 10)))
+    warm = SpectreSiteResolver(path, defaultRuleOnly=defaultRuleOnly)
+    warm.load()
+    print("warm:  {:10.0f} lookups/s".format(bench(warm, make_urls(1000), lookups)))
+# main
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -4,10 +4,80 @@ from toga.style.pack import COLUMN, ROW
 from pyplayground import G
 from com.t_arn.pymod.ui.window import TaWindow, TaGui
 import sys
-from spectre_algorithm import spectreTypes, SpectreUser, spectre
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from spectre_tables import ALGORITHM_CURRENT, RESULT_TYPE
+from spectre_algorithm import SpectreUser
+
+
+class StaleRequest(Exception):
+    pass
+# StaleRequest
+
+
+class ResultPipeline:
+    """
+    Generates the site results off the UI thread.
+    The SpectreUser (and its scrypt user key) is only re-derived when the name,
+    the secret or the algorithm version changed. Site, counter and result type
+    changes only need the cheap HMAC and template steps.
+    Every request gets an id; requests superseded by a newer one are skipped.
+    """
+
+    def __init__(self):
+        # a single worker serializes the scrypt work, queued stale requests are dropped
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self._requestId = 0
+        self._user = None
+        self._userInputs = None
+        self._tested = False
+    # __init__
+
+    def new_request(self):
+        with self._lock:
+            self._requestId += 1
+            return self._requestId
+    # new_request
+
+    def is_current(self, requestId):
+        with self._lock:
+            return requestId == self._requestId
+    # is_current
+
+    def _check_current(self, requestId):
+        if not self.is_current(requestId):
+            raise StaleRequest()
+    # _check_current
+
+    def generate(self, requestId, username, masterpw, algover, rtype, site, counter):
+        # runs on the executor thread
+        self._check_current(requestId)
+        if not self._tested:
+            SpectreUser.test()
+            self._tested = True
+        userInputs = (username, masterpw, algover)
+        if self._user is None or userInputs != self._userInputs:
+            self._check_current(requestId)
+            if self._user is not None:
+                self._user.invalidate()
+            self._user = None
+            self._userInputs = None
+            self._user = SpectreUser(username, masterpw, algorithmVersion=algover)
+            self._userInputs = userInputs
+        self._check_current(requestId)
+        sitelogin = self._user.login(site, keyCounter=counter)
+        sitepw = self._user.password(site, resultType=RESULT_TYPE[rtype], keyCounter=counter)
+        return sitelogin, sitepw, self._user.identicon
+    # generate
+# ResultPipeline
 
 
 class MainGui(TaGui):
+    # delay after the last keystroke in the site field before regenerating
+    DEBOUNCE_SECONDS = 0.3
 
     def __init__(self, app, parentGui, title, **kwargs):
         super().__init__(app, parentGui, title, **kwargs)
@@ -17,6 +87,7 @@ class MainGui(TaGui):
         self.ti_name = None
         self.ti_masterpw = None
         self.ti_site = None
+        self.pipeline = ResultPipeline()
     # __init__
 
     def build_gui(self):
@@ -94,7 +165,7 @@ class MainGui(TaGui):
         self.main_box.add(toga.Label("Test App for spectre", style=Pack(flex=1, font_size=18)))
         type_box = toga.Box(style=Pack(direction=ROW))
         type_box.add(toga.Label("Result Type", style=Pack(flex=1)))
-        rtypes = spectreTypes.resultType.keys()
+        rtypes = RESULT_TYPE.keys()
         self.rtypesel = toga.Selection(items=rtypes, style=Pack(flex=1))
         self.rtypesel.value = "templateLong"
         type_box.add(self.rtypesel)
@@ -104,7 +175,7 @@ class MainGui(TaGui):
         algo_box.add(toga.Label("Algorithm Version", style=Pack(flex=1)))
         versions = ["0","1","2","3"]
         self.algosel = toga.Selection(items=versions, style=Pack(flex=1))
-        self.algosel.value = str(spectreTypes.algorithm["current"])
+        self.algosel.value = str(ALGORITHM_CURRENT)
         algo_box.add(self.algosel)
         self.main_box.add(algo_box)
 
@@ -152,29 +223,51 @@ class MainGui(TaGui):
         _button_box.add(toga.Button("Clear", on_press=self.handle_btn_clear))
         _button_box.add(toga.Label("", style=Pack(flex=1)))
         self.main_box.add(_button_box)
+
+        # live updates (the handlers are set after the initial values)
+        self.ti_site.on_change = self.handle_site_change
+        self.rtypesel.on_select = self.handle_selection_change
+        self.countsel.on_select = self.handle_selection_change
+        self.algosel.on_select = self.handle_selection_change
     # build_gui
 
     def handle_btn_clear(self, widget):
         self.message_area.clear()
     # handle_btn_clear
 
-    def handle_btn_generate(self, widget):
+    async def handle_btn_generate(self, widget):
+        await self.regenerate(0)
+    # handle_btn_generate
+
+    def handle_site_change(self, widget):
+        asyncio.ensure_future(self.regenerate(self.DEBOUNCE_SECONDS))
+    # handle_site_change
+
+    def handle_selection_change(self, widget):
+        asyncio.ensure_future(self.regenerate(0))
+    # handle_selection_change
+
+    async def regenerate(self, delay):
+        requestId = self.pipeline.new_request()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            if not self.pipeline.is_current(requestId):
+                return
         try:
-            self.fnPrintln("Generating...")
+            started = time.perf_counter()
             username = self.ti_name.value
             masterpw = self.ti_masterpw.value
             algover = int(self.algosel.value)
             rtype = self.rtypesel.value
             site = self.ti_site.value
             counter = int(self.countsel.value)
-            # userKey = spectre.newUserKey(username, masterpw, algover)
-            # sitepw = spectre.newSiteResult(userKey, site, resultType=spectreTypes.resultType[rtype], keyCounter=counter)
-            # icon = spectre.newIdenticon(username, masterpw)
-            user = SpectreUser(username, masterpw, algorithmVersion=algover)
-            user.test()
-            sitelogin = user.login(site, keyCounter=counter)
-            sitepw = user.password(site, resultType=spectreTypes.resultType[rtype], keyCounter=counter)
-            icon = user.identicon
+            loop = asyncio.get_running_loop()
+            sitelogin, sitepw, icon = await loop.run_in_executor(
+                self.pipeline.executor, self.pipeline.generate,
+                requestId, username, masterpw, algover, rtype, site, counter
+            )
+            if not self.pipeline.is_current(requestId):
+                return
             icstr = icon["leftArm"]
             icstr += icon["body"]
             icstr += icon["rightArm"]
@@ -183,12 +276,14 @@ class MainGui(TaGui):
             self.lbl_sitelogin.text = sitelogin
             self.lbl_sitepw.text = sitepw
             self.lbl_identicon.text = icstr
-            self.fnPrintln("Done")
-        except BaseException as ex:
-            G.write_debug_message(str(ex))
-            self.fnPrintln("\n"+str(ex))
-    # handle_btn_generate
-
+            self.fnPrintln("Done in {:.0f} ms".format((time.perf_counter() - started) * 1000))
+        except StaleRequest:
+            pass
+        except Exception as ex:
+            if self.pipeline.is_current(requestId):
+                G.write_debug_message(str(ex))
+                self.fnPrintln("\n"+str(ex))
+    # regenerate
 
     def fnPrint(self, message):
         self.message_area.value += message